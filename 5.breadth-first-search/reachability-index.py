@@ -0,0 +1,442 @@
+from typing import List, Dict
+from queue import Queue
+import random
+import sys
+import time
+
+
+class Node:
+    def __init__(self, index: int):
+        self.index = index
+        self.edges: Dict[int, Edge] = {}
+
+
+class Edge:
+    def __init__(self, from_node: int, to_node: int, weight: float):
+        self.from_node = from_node
+        self.to_node = to_node
+        self.weight = weight
+
+
+class Graph:
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self.nodes: List[Node] = [Node(i) for i in range(num_nodes)]
+
+    def insert_edge(self, from_node: int, to_node: int, weight: float):
+        self.nodes[from_node].edges[to_node] = Edge(from_node, to_node, weight)
+
+    def remove_edge(self, from_node: int, to_node: int):
+        if to_node in self.nodes[from_node].edges:
+            del self.nodes[from_node].edges[to_node]
+
+
+# Number of hops from start to every node, -1 if it can't be reached
+def bfs_distances(g: Graph, start: int) -> List[int]:
+    dist = [-1] * g.num_nodes
+    pending = Queue()
+
+    pending.put(start)
+    dist[start] = 0
+
+    while not pending.empty():
+        index = pending.get()
+        for neighbor in g.nodes[index].edges:
+            if dist[neighbor] == -1:
+                dist[neighbor] = dist[index] + 1
+                pending.put(neighbor)
+
+    return dist
+
+
+# Answering "can a reach b" or "how many hops from a to b" with a fresh BFS
+# costs O(V + E) per question. When there are many questions on the same graph
+# it pays to do the work once up front and keep an index around.
+
+
+# Strongly connected components with an iterative Tarjan's algorithm.
+# Components come out in reverse topological order: a component is only
+# emitted after every component it can reach.
+def strongly_connected_components(g: Graph) -> List[List[int]]:
+    index_of = [-1] * g.num_nodes
+    low = [0] * g.num_nodes
+    on_stack = [False] * g.num_nodes
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(g.num_nodes):
+        if index_of[root] != -1:
+            continue
+        work = [(root, iter(g.nodes[root].edges))]
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        while work:
+            node, neighbors = work[-1]
+            advanced = False
+            for neighbor in neighbors:
+                if index_of[neighbor] == -1:
+                    index_of[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack[neighbor] = True
+                    work.append((neighbor, iter(g.nodes[neighbor].edges)))
+                    advanced = True
+                    break
+                if on_stack[neighbor]:
+                    low[node] = min(low[node], index_of[neighbor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+# Transitive closure stored as one bitset per node (a row of a boolean
+# adjacency matrix), using Python ints so a whole row is OR-ed at once.
+# Bit b of reach[a] is set if b can be reached from a.
+# Nodes of one strongly connected component share a row, so graphs with a big
+# component stay small. The worst case is a DAG-like graph where many nodes
+# reach different large sets, which costs up to V * V / 8 bytes (about 1 GB
+# for 10^5 nodes, see the DAG benchmark below). Use DistanceLabels there.
+class TransitiveClosure:
+    def __init__(self, g: Graph):
+        self.g = g
+        self.build()
+
+    def build(self):
+        begin = time.perf_counter()
+        n = self.g.num_nodes
+        component_of = [-1] * n
+        comp_reach = []
+
+        # Every node of a component reaches the same set, and the components
+        # it points to are already done, so one pass is enough
+        for comp, members in enumerate(strongly_connected_components(self.g)):
+            bits = 0
+            for member in members:
+                component_of[member] = comp
+                bits |= 1 << member
+            for member in members:
+                for neighbor in self.g.nodes[member].edges:
+                    other = component_of[neighbor]
+                    if other != comp:
+                        bits |= comp_reach[other]
+            comp_reach.append(bits)
+
+        # Nodes of the same component share one int
+        self.reach = [comp_reach[component_of[i]] for i in range(n)]
+        self.build_time = time.perf_counter() - begin
+
+    def reachable(self, a: int, b: int) -> bool:
+        if a < 0 or a >= self.g.num_nodes:
+            raise IndexError
+        if b < 0 or b >= self.g.num_nodes:
+            raise IndexError
+        return (self.reach[a] >> b) & 1 == 1
+
+    # Everything that reaches a now also reaches everything b reaches
+    def insert_edge(self, from_node: int, to_node: int, weight: float):
+        if from_node < 0 or from_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node < 0 or to_node >= self.g.num_nodes:
+            raise IndexError
+        self.g.insert_edge(from_node, to_node, weight)
+        if self.reachable(from_node, to_node):
+            return
+        new_bits = self.reach[to_node]
+        for i in range(self.g.num_nodes):
+            if (self.reach[i] >> from_node) & 1:
+                self.reach[i] |= new_bits
+
+    # Removing an edge can shrink many rows at once, rebuild from scratch
+    def remove_edge(self, from_node: int, to_node: int):
+        if from_node < 0 or from_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node < 0 or to_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node not in self.g.nodes[from_node].edges:
+            return
+        self.g.remove_edge(from_node, to_node)
+        self.build()
+
+    def memory_bytes(self) -> int:
+        seen = set()
+        total = sys.getsizeof(self.reach)
+        for bits in self.reach:
+            if id(bits) not in seen:
+                seen.add(id(bits))
+                total += sys.getsizeof(bits)
+        return total
+
+
+# Pruned landmark labeling (2-hop labels) for exact hop distances.
+# Every node v keeps two small dicts of hubs:
+#   label_out[v][h] = distance from v to hub h
+#   label_in[v][h] = distance from hub h to v
+# and the distance from a to b is the best a -> h -> b over their shared hubs.
+# Hubs are processed from highest to lowest degree, and a BFS from a hub stops
+# expanding wherever the labels built so far already give the right answer,
+# which keeps the labels small.
+class DistanceLabels:
+    def __init__(self, g: Graph):
+        self.g = g
+        self.build()
+
+    def build(self):
+        begin = time.perf_counter()
+        n = self.g.num_nodes
+        self.in_neighbors = [[] for _ in range(n)]
+        for node in self.g.nodes:
+            for to_node in node.edges:
+                self.in_neighbors[to_node].append(node.index)
+
+        self.label_out: List[Dict[int, int]] = [{} for _ in range(n)]
+        self.label_in: List[Dict[int, int]] = [{} for _ in range(n)]
+        order = sorted(
+            range(n),
+            key=lambda i: -(len(self.g.nodes[i].edges) + len(self.in_neighbors[i])),
+        )
+        for hub in order:
+            self._pruned_bfs(hub, hub, 0, True)
+            self._pruned_bfs(hub, hub, 0, False)
+        self.build_time = time.perf_counter() - begin
+
+    def _query(self, a: int, b: int) -> int:
+        out_a = self.label_out[a]
+        in_b = self.label_in[b]
+        if len(out_a) > len(in_b):
+            out_a, in_b = in_b, out_a
+        best = -1
+        for hub, d1 in out_a.items():
+            d2 = in_b.get(hub)
+            if d2 is not None and (best == -1 or d1 + d2 < best):
+                best = d1 + d2
+        return best
+
+    # BFS from `start` at distance `dist` on behalf of `hub`. Forward fills
+    # label_in (hub -> node), backward follows edges in reverse and fills
+    # label_out (node -> hub).
+    def _pruned_bfs(self, hub: int, start: int, dist: int, forward: bool):
+        seen = {start}
+        pending = Queue()
+        pending.put((start, dist))
+
+        while not pending.empty():
+            index, d = pending.get()
+            if forward:
+                known = self._query(hub, index)
+            else:
+                known = self._query(index, hub)
+            if known != -1 and known <= d:
+                continue
+            if forward:
+                self.label_in[index][hub] = d
+                neighbors = self.g.nodes[index].edges
+            else:
+                self.label_out[index][hub] = d
+                neighbors = self.in_neighbors[index]
+            for neighbor in neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    pending.put((neighbor, d + 1))
+
+    def distance(self, a: int, b: int) -> int:
+        if a < 0 or a >= self.g.num_nodes:
+            raise IndexError
+        if b < 0 or b >= self.g.num_nodes:
+            raise IndexError
+        return self._query(a, b)
+
+    def reachable(self, a: int, b: int) -> bool:
+        return self.distance(a, b) != -1
+
+    # A new edge only makes paths shorter. Every hub that reaches from_node
+    # resumes its BFS at to_node, and every hub reached from to_node resumes
+    # its reverse BFS at from_node. Old entries may become too large but
+    # are never used since queries take the smallest sum.
+    def insert_edge(self, from_node: int, to_node: int, weight: float):
+        if from_node < 0 or from_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node < 0 or to_node >= self.g.num_nodes:
+            raise IndexError
+        # An existing edge only gets its weight updated, hop counts don't change
+        existed = to_node in self.g.nodes[from_node].edges
+        self.g.insert_edge(from_node, to_node, weight)
+        if existed:
+            return
+        self.in_neighbors[to_node].append(from_node)
+        for hub, d in list(self.label_in[from_node].items()):
+            self._pruned_bfs(hub, to_node, d + 1, True)
+        for hub, d in list(self.label_out[to_node].items()):
+            self._pruned_bfs(hub, from_node, d + 1, False)
+
+    # Removing an edge can make labels wrong rather than just loose, rebuild
+    def remove_edge(self, from_node: int, to_node: int):
+        if from_node < 0 or from_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node < 0 or to_node >= self.g.num_nodes:
+            raise IndexError
+        if to_node not in self.g.nodes[from_node].edges:
+            return
+        self.g.remove_edge(from_node, to_node)
+        self.build()
+
+    def num_entries(self) -> int:
+        return sum(len(x) for x in self.label_out) + sum(len(x) for x in self.label_in)
+
+    # Labels plus the in-neighbor lists kept for incremental inserts
+    def memory_bytes(self) -> int:
+        total = sys.getsizeof(self.label_out) + sys.getsizeof(self.label_in)
+        for labels in self.label_out + self.label_in:
+            total += sys.getsizeof(labels)
+        total += sys.getsizeof(self.in_neighbors)
+        for neighbors in self.in_neighbors:
+            total += sys.getsizeof(neighbors)
+        return total
+
+
+def make_example_graph() -> Graph:
+    g = Graph(6)
+    g.insert_edge(0, 1, 1.0)
+    g.insert_edge(1, 2, 1.0)
+    g.insert_edge(2, 0, 1.0)
+    g.insert_edge(2, 3, 1.0)
+    g.insert_edge(4, 5, 1.0)
+    return g
+
+
+# Each index updates its own graph when edges change, so they get separate copies
+closure = TransitiveClosure(make_example_graph())
+labels = DistanceLabels(make_example_graph())
+print(closure.reachable(0, 3), labels.distance(0, 3))  # True 3
+print(closure.reachable(3, 0), labels.distance(3, 0))  # False -1
+
+closure.insert_edge(3, 4, 1.0)
+labels.insert_edge(3, 4, 1.0)
+print(closure.reachable(0, 5), labels.distance(0, 5))  # True 5
+
+# Inserting an existing edge updates its weight in both
+closure.insert_edge(3, 4, 2.0)
+labels.insert_edge(3, 4, 2.0)
+print(closure.g.nodes[3].edges[4].weight, labels.g.nodes[3].edges[4].weight)  # 2.0 2.0
+
+closure.remove_edge(2, 3)
+labels.remove_edge(2, 3)
+print(closure.reachable(0, 5), labels.distance(0, 5))  # False -1
+
+# Removing an edge that isn't there changes nothing and doesn't rebuild
+closure.remove_edge(2, 3)
+labels.remove_edge(2, 3)
+
+
+# Benchmark: build cost, memory and query speed against running a BFS for
+# every question.
+#
+# On random directed graphs most nodes fall into one big strongly connected
+# component, which the closure stores once, so the closure is tiny and quick
+# while the labels get slow to build. On a random DAG every node reaches a
+# different set and the closure grows as V * V / 8, which at 10^5 nodes is
+# about 1 GB against a few tens of MB for the labels.
+def make_random_graph(num_nodes: int, num_edges: int, seed: int) -> Graph:
+    rng = random.Random(seed)
+    g = Graph(num_nodes)
+    for _ in range(num_edges):
+        g.insert_edge(rng.randrange(num_nodes), rng.randrange(num_nodes), 1.0)
+    return g
+
+
+# Random edges, always pointing from the lower to the higher index
+def make_random_dag(num_nodes: int, num_edges: int, seed: int) -> Graph:
+    rng = random.Random(seed)
+    g = Graph(num_nodes)
+    for _ in range(num_edges):
+        a = rng.randrange(num_nodes)
+        b = rng.randrange(num_nodes)
+        if a != b:
+            g.insert_edge(min(a, b), max(a, b), 1.0)
+    return g
+
+
+def check(closure: TransitiveClosure, labels: DistanceLabels, sources: List[int]):
+    for a in sources:
+        dist = bfs_distances(labels.g, a)
+        for b in range(labels.g.num_nodes):
+            assert labels.distance(a, b) == dist[b]
+            assert closure.reachable(a, b) == (dist[b] != -1)
+
+
+def benchmark(name: str, make_graph, num_nodes: int, num_edges: int):
+    rng = random.Random(2)
+    closure = TransitiveClosure(make_graph(num_nodes, num_edges, 1))
+    labels = DistanceLabels(make_graph(num_nodes, num_edges, 1))
+    print(f"{name}: {num_nodes} nodes, {num_edges} edges")
+    print(
+        f"  closure: build {closure.build_time:.2f}s, "
+        f"{closure.memory_bytes() / 1e6:.1f} MB"
+    )
+    print(
+        f"  labels:  build {labels.build_time:.2f}s, "
+        f"{labels.memory_bytes() / 1e6:.1f} MB, "
+        f"{labels.num_entries() / num_nodes:.1f} entries per node"
+    )
+
+    queries = [
+        (rng.randrange(num_nodes), rng.randrange(num_nodes)) for _ in range(10000)
+    ]
+    begin = time.perf_counter()
+    for a, b in queries:
+        closure.reachable(a, b)
+    closure_time = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for a, b in queries:
+        labels.distance(a, b)
+    labels_time = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for a, b in queries[:20]:
+        bfs_distances(labels.g, a)[b]
+    bfs_time = (time.perf_counter() - begin) / 20 * len(queries)
+    print(
+        f"  {len(queries)} queries: closure {closure_time:.3f}s, "
+        f"labels {labels_time:.3f}s, bfs (estimated) {bfs_time:.1f}s"
+    )
+    check(closure, labels, [a for a, _ in queries[:5]])
+
+    new_edges = [
+        (rng.randrange(num_nodes), rng.randrange(num_nodes)) for _ in range(20)
+    ]
+    begin = time.perf_counter()
+    for a, b in new_edges:
+        closure.insert_edge(a, b, 1.0)
+    closure_insert = (time.perf_counter() - begin) / len(new_edges)
+    begin = time.perf_counter()
+    for a, b in new_edges:
+        labels.insert_edge(a, b, 1.0)
+    labels_insert = (time.perf_counter() - begin) / len(new_edges)
+    print(
+        f"  insert edge: closure {closure_insert * 1000:.1f}ms, "
+        f"labels {labels_insert * 1000:.1f}ms"
+    )
+    check(closure, labels, [a for a, _ in queries[5:10]])
+
+
+benchmark("random", make_random_graph, 2000, 3000)
+benchmark("random", make_random_graph, 10000, 15000)
+benchmark("dag", make_random_dag, 10000, 10000)
+benchmark("dag", make_random_dag, 100000, 100000)